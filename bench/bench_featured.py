@@ -0,0 +1,76 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from indexer import FeaturedRanks  # noqa: E402
+
+
+def naive_ranks(flags):
+    # What the list used to do on every toggle or move: recompute every rank
+    out = []
+    rank = 0
+    for f in flags:
+        if f:
+            rank += 1
+            out.append(rank)
+        else:
+            out.append(None)
+    return out
+
+
+def bench_featured(sizes=(10_000, 50_000), ops: int = 2000, share: float = 0.2) -> None:
+    for n in sizes:
+        rng = random.Random(n)
+        flags = [rng.random() < share for _ in range(n)]
+        toggles = [rng.randrange(n) for _ in range(ops)]
+        moves = [(rng.randrange(n), rng.randrange(n)) for _ in range(ops)]
+        visible = 40
+
+        t = time.perf_counter()
+        ranks = FeaturedRanks(flags)
+        build = time.perf_counter() - t
+
+        naive_flags = list(flags)
+        t = time.perf_counter()
+        for pos in toggles:
+            naive_flags[pos] = not naive_flags[pos]
+            naive_ranks(naive_flags)
+        for src, dst in moves:
+            naive_flags.insert(dst, naive_flags.pop(src))
+            naive_ranks(naive_flags)
+        naive = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for pos in toggles:
+            ranks.set(pos, not ranks.flags[pos])
+            # A repaint asks for the ranks of the rows on screen
+            for row in range(pos, min(n, pos + visible)):
+                ranks.rank(row)
+        for src, dst in moves:
+            ranks.move(src, dst)
+            for row in range(dst, min(n, dst + visible)):
+                ranks.rank(row)
+        fast = time.perf_counter() - t
+
+        assert [ranks.rank(i) for i in range(n)] == naive_ranks(naive_flags)
+        per_naive = naive / (2 * ops) * 1e6
+        per_fast = fast / (2 * ops) * 1e6
+        print(
+            f"{n:>7} rows, {ranks.total} featured: build {build * 1e3:.1f} ms, "
+            f"full recompute {per_naive:.0f} us/edit, "
+            f"incremental {per_fast:.0f} us/edit ({per_naive / per_fast:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time featured-rank upkeep (FeaturedRanks) against a full recompute per edit."
+    )
+    parser.add_argument("rows", type=int, nargs="*", default=[10_000, 50_000], help="list sizes to try")
+    parser.add_argument("--ops", type=int, default=2000, help="toggles and moves per size")
+    args = parser.parse_args()
+    bench_featured(sizes=args.rows, ops=args.ops)
@@ -1,116 +1,1146 @@
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import count
+from operator import mul, sub
 from pathlib import Path
 
 current = Path(__file__).parent
-art = current  / "src" / "art"
-if not art.exists():
-    art.mkdir(parents=True)
-compact = current / "src" / "compact_art"
-if not compact.exists():
-    compact.mkdir(parents=True)
-posters = current / "src" / "compact_art_posters"
-if not posters.exists():
-    posters.mkdir(parents=True)
-compact_lq = current / "src" / "compact_art_lq"
-if not compact_lq.exists():
-    compact_lq.mkdir(parents=True)
-compact_ulq = current / "src" / "compact_art_ulq"
-if not compact_ulq.exists():
-    compact_ulq.mkdir(parents=True)
-posters_lq = current / "src" / "compact_art_posters_lq"
-if not posters_lq.exists():
-    posters_lq.mkdir(parents=True)
-posters_ulq = current / "src" / "compact_art_posters_ulq"
-if not posters_ulq.exists():
-    posters_ulq.mkdir(parents=True)
-file_list = []
-for p in art.iterdir():
-    if p.is_file() and p.suffix in [
-        ".png",
-        ".jpg",
-        ".jpeg",
-        ".gif",
-        ".webp",
-        ".bmp",
-        ".tiff",
-        ".svg",
-        ".avif",
-    ]:
-        file_list.append(p)
-for p in file_list:
-    source = art / p.name
-    dest = compact / p.name
-    # Always recopy GIFs to avoid prior resized/corrupted outputs; non-GIFs will be generated from source.
-    if p.suffix.lower() == ".gif":
-        if (not dest.exists()) or (source.stat().st_mtime > dest.stat().st_mtime):
-            print(f"Copying GIF {p.name}...")
-            with open(source, "rb") as fsrc:
-                if not dest.exists():
-                    dest.touch()
-                with open(dest, "wb") as fdst:
-                    fdst.write(fsrc.read())
-
-print("Generating resized images and posters (ULQ/LQ/HQ)...")
-from PIL import Image
-
-
-def save_resized(src_path: Path, max_dim: int, out_path: Path):
+src_root = current / "src"
+art = src_root / "art"
+compact = src_root / "compact_art"
+posters = src_root / "compact_art_posters"
+compact_lq = src_root / "compact_art_lq"
+compact_ulq = src_root / "compact_art_ulq"
+posters_lq = src_root / "compact_art_posters_lq"
+posters_ulq = src_root / "compact_art_posters_ulq"
+# Build manifest: source hash, settings and outputs of every derivative we produced
+manifest_path = src_root / "compact_manifest.json"
+
+ART_EXTS = [
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".bmp",
+    ".tiff",
+    ".svg",
+    ".avif",
+    ".mp4",
+]
+# Sources that only get poster tiers, from a representative frame
+VIDEO_EXTS = [".mp4"]
+
+# Bump whenever the way derivatives are generated changes, so every entry rebuilds
+BUILD_VERSION = 6
+MANIFEST_VERSION = 1
+
+# (tier, max dimension, resized dir, poster dir)
+TIERS = [
+    ("hq", 512, compact, posters),
+    ("lq", 256, compact_lq, posters_lq),
+    ("ulq", 96, compact_ulq, posters_ulq),
+]
+# Animated GIF tiers that get an optimised (deduped, shared palette) re-encode
+GIF_TIERS = ["hq", "lq"]
+# Optional lighter encodings of each animated tier the front end may pick instead
+ANIM_FALLBACKS = ["webp", "mp4"]
+# Longest side of the inline placeholder stored in the manifest
+LQIP_SIZE = 16
+# Frames sampled into the montage the shared GIF palette is built from
+PALETTE_SAMPLE_FRAMES = 24
+# Video poster search: samples per second, most samples taken, and the tiny
+# greyscale size they are scored at
+POSTER_SAMPLE_FPS = 4
+POSTER_SAMPLE_FRAMES = 240
+POSTER_SAMPLE_SIZE = (64, 36)
+# Bump when the choice of poster frame changes, so cached frames are re-picked
+POSTER_VERSION = 1
+
+
+def ensure_dirs():
+    for d in [art, compact, posters, compact_lq, compact_ulq, posters_lq, posters_ulq]:
+        if not d.exists():
+            d.mkdir(parents=True)
+
+
+def collect_sources():
+    file_list = []
+    for p in art.iterdir():
+        if p.is_file() and p.suffix in ART_EXTS:
+            file_list.append(p)
+    return sorted(file_list, key=lambda p: p.name)
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ffmpeg_path():
+    # KEMELVOR_FFMPEG overrides the ffmpeg on PATH (e.g. a stub in tests)
+    return os.environ.get("KEMELVOR_FFMPEG") or shutil.which("ffmpeg")
+
+
+def cache_dir() -> Path:
+    # Per-user cache shared with indexer.py (src/ is published as-is)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "kemelvor-indexer"
+
+
+def source_fingerprint(path: Path, previous=None) -> dict:
+    st = path.stat()
+    # Reuse the stored hash when size and mtime are unchanged (same shortcut git uses)
+    if (
+        previous
+        and previous.get("bytes") == st.st_size
+        and previous.get("mtime_ns") == st.st_mtime_ns
+        and previous.get("hash")
+    ):
+        digest = previous["hash"]
+    else:
+        digest = file_digest(path)
+    return {"hash": digest, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def settings_for(path: Path, options=None) -> dict:
+    options = options or {}
+    ext = path.suffix.lower()
+    kind = "gif" if ext == ".gif" else "video" if ext in VIDEO_EXTS else "resize"
+    settings = {
+        "build": BUILD_VERSION,
+        "kind": kind,
+        "tiers": [size for _, size, _, _ in TIERS],
+        "resample": "lanczos",
+        "pyramid": True,
+        "formats": list(options.get("formats", [])),
+        "min_ssim": options.get("min_ssim"),
+        "png_optimise": options.get("png_optimise", True),
+        "quant_tiers": list(options.get("quant_tiers", [])),
+        "quant_min_ssim": options.get("quant_min_ssim"),
+        "gif_tiers": GIF_TIERS if kind == "gif" else [],
+        "anim_fallbacks": list(options.get("anim_fallbacks", [])) if kind == "gif" else [],
+    }
+    if kind == "video":
+        settings["poster"] = [POSTER_VERSION, POSTER_SAMPLE_FPS, POSTER_SAMPLE_FRAMES]
+    return settings
+
+
+def load_manifest() -> dict:
+    if manifest_path.exists():
+        try:
+            data = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION and isinstance(
+                data.get("files"), dict
+            ):
+                return data
+        except Exception:
+            pass  # Corrupt or outdated manifest: rebuild everything
+    return {"version": MANIFEST_VERSION, "files": {}}
+
+
+TMP_SUFFIX = ".tmp"
+_tmp_serial = count()
+
+
+def _create_temp(path: Path) -> Path:
+    # Like mkstemp, but created 0666 less the umask as a plain open() would be
+    # (mkstemp's 0600 would carry over to the published file)
+    while True:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}-{next(_tmp_serial)}{TMP_SUFFIX}")
+        try:
+            os.close(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+            return tmp
+        except FileExistsError:
+            continue
+
+
+@contextlib.contextmanager
+def atomic_output(path: Path):
+    # Yields a temp path next to `path`; it replaces `path` only if the block
+    # completes, so an interrupted build never leaves a half-written file behind
+    tmp = _create_temp(path)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_bytes_atomic(path: Path, data: bytes):
+    with atomic_output(path) as tmp:
+        tmp.write_bytes(data)
+
+
+def save_image_atomic(im, path: Path):
+    from PIL import Image
+
+    # The temp name has no image extension, so pass the format explicitly
+    fmt = Image.registered_extensions().get(path.suffix.lower())
+    with atomic_output(path) as tmp:
+        im.save(tmp, format=fmt)
+
+
+def remove_stale_temps():
+    # Leftovers from a build killed hard enough to skip atomic_output's cleanup
+    for d in [compact, posters, compact_lq, compact_ulq, posters_lq, posters_ulq, src_root]:
+        for p in d.glob(f".*{TMP_SUFFIX}"):
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+def write_text_atomic(path: Path, text: str):
+    write_bytes_atomic(path, text.encode("utf-8"))
+
+
+def save_manifest(manifest: dict):
+    write_text_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def rel(path: Path) -> str:
+    return path.relative_to(src_root).as_posix()
+
+
+def output_record(tier: str, path: Path, size, variants=None) -> dict:
+    record = {
+        "tier": tier,
+        "path": rel(path),
+        "size": list(size),
+        "bytes": path.stat().st_size,
+    }
+    if variants is not None:
+        record["variants"] = variants
+        # Smallest acceptable encoding of this tier, the original format included
+        best = min([record] + variants, key=lambda v: v["bytes"])
+        record["best"] = best["path"]
+    return record
+
+
+def output_paths(outputs):
+    for o in outputs:
+        yield o["path"]
+        for v in o.get("variants", []):
+            yield v["path"]
+
+
+def outputs_exist(entry: dict) -> bool:
+    return all((src_root / p).exists() for p in output_paths(entry.get("outputs", [])))
+
+
+def is_up_to_date(entry, fingerprint: dict, settings: dict) -> bool:
+    return (
+        entry is not None
+        and entry.get("hash") == fingerprint["hash"]
+        and entry.get("settings") == settings
+        and outputs_exist(entry)
+    )
+
+
+def remove_outputs(outputs, keep=()):
+    keep = set(keep)
+    for path in output_paths(outputs):
+        if path in keep:
+            continue
+        out = src_root / path
+        try:
+            out.unlink()
+            print(f"Removed stale {path}")
+        except FileNotFoundError:
+            pass
+
+
+def copy_gif(source: Path, dest: Path):
+    print(f"Copying GIF {source.name}...")
+    # copyfile streams in chunks and uses sendfile()/fcopyfile() where available
+    with atomic_output(dest) as tmp:
+        shutil.copyfile(source, tmp)
+        shutil.copystat(source, tmp)
+
+
+def tier_size(size, max_dim: int):
+    w, h = size
+    scale = min(1.0, max_dim / max(w, h))
+    return int(w * scale), int(h * scale)
+
+
+def draft_request(size):
+    # Size asked of libjpeg's draft(): 2x headroom over the largest tier
+    return size[0] * 2, size[1] * 2
+
+
+def estimate_decoded_bytes(src_path: Path) -> int:
+    # Bytes the decoded working set is expected to need, read from the header only
+    from PIL import Image
+
     with Image.open(src_path) as im:
-        im_format = im.format
+        bands = len(im.getbands())
+        full_decode = im.format not in ("JPEG", "GIF")
+        if im.format == "JPEG":
+            # draft() only reconfigures the decoder, so this does not decode anything
+            target = tier_size(im.size, TIERS[0][1])
+            if target != im.size:
+                im.draft("RGB", draft_request(target))
+        elif im.format == "GIF":
+            bands = 1 + 4  # palette frame plus the RGBA poster
         w, h = im.size
-        scale = min(1.0, max_dim / max(w, h))
-        new_w, new_h = int(w * scale), int(h * scale)
-        if scale < 1.0:
-            im = im.resize((new_w, new_h), Image.LANCZOS)
-        # Ensure parents exist
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        im.save(out_path)
-
-
-for p in file_list:
-    src = art / p.name
-    suffix = p.suffix.lower()
-    stem = p.stem
-    if suffix == ".gif":
-        # Posters from original GIF first frame at ULQ/LQ/HQ
+    decoded = w * h * bands
+    if full_decode:
+        # PNG and friends have no reduced-scale decode, so staging cannot shrink
+        # this: the whole frame is decoded, resizing with alpha makes a
+        # premultiplied copy of it, and the first LANCZOS pass keeps an
+        # intermediate of up to half the frame
+        if bands in (2, 4):
+            decoded *= 2
+        return decoded + w * h * bands // 2
+    # The first reduction step lives alongside the full frame for a moment
+    return decoded + decoded // 4
+
+
+def reset_peak_rss() -> bool:
+    # Linux lets a process reset its resident high-water mark (VmHWM)
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def format_mb(n) -> str:
+    return f"{n / (1 << 20):.1f} MB"
+
+
+# Encoder settings per modern format; lossless is the fallback when lossy misses
+# the SSIM threshold (flat-colour pixel art often compresses best that way)
+MODERN_FORMATS = {
+    "webp": [
+        {"format": "WEBP", "quality": 82, "method": 6},
+        {"format": "WEBP", "lossless": True, "quality": 80, "method": 4},
+    ],
+    "avif": [
+        {"format": "AVIF", "quality": 60, "speed": 6},
+    ],
+}
+DEFAULT_FORMATS = ["webp", "avif"]
+DEFAULT_MIN_SSIM = 0.985
+# Tiers fetched first on page load may be palette-quantised with a small loss
+QUANT_TIERS = ["lq", "ulq"]
+DEFAULT_QUANT_MIN_SSIM = 0.99
+
+
+def format_available(fmt: str) -> bool:
+    from PIL import features
+
+    if fmt == "avif" and not features.check("avif"):
         try:
-            with Image.open(src) as im:
-                try:
-                    im.seek(0)
-                except Exception:
-                    pass
-                poster = im.convert("RGBA")
-                # Save three sizes
-                for size, out_dir in [
-                    (96, posters_ulq),
-                    (256, posters_lq),
-                    (512, posters),
-                ]:
-                    w, h = poster.size
-                    scale = min(1.0, size / max(w, h))
-                    new_w, new_h = int(w * scale), int(h * scale)
-                    out_img = (
-                        poster
-                        if scale == 1.0
-                        else poster.resize((new_w, new_h), Image.LANCZOS)
+            import pillow_avif  # noqa: F401  (registers AVIF on older Pillow)
+        except ImportError:
+            return False
+        return True
+    return bool(features.check(fmt))
+
+
+def _ssim_plane(im):
+    # Luma as float; transparent areas are composited over mid-grey so alpha
+    # differences still count
+    from PIL import Image
+
+    if im.mode not in ("RGB", "L"):
+        im = im.convert("RGBA")
+        bg = Image.new("RGBA", im.size, (128, 128, 128, 255))
+        im = Image.alpha_composite(bg, im)
+    return im.convert("L").convert("F")
+
+
+def _image_product(a, b):
+    from PIL import ImageMath
+
+    if hasattr(ImageMath, "lambda_eval"):
+        return ImageMath.lambda_eval(lambda args: args["a"] * args["b"], a=a, b=b)
+    return ImageMath.eval("a * b", a=a, b=b)
+
+
+def ssim(reference, candidate, block: int = 8) -> float:
+    # Mean SSIM over non-overlapping blocks. Block statistics come from reduce(),
+    # which box-averages in C, so only one value per block is touched in Python.
+    from array import array
+
+    x = _ssim_plane(reference)
+    y = _ssim_plane(candidate)
+
+    def means(im):
+        return array("f", im.reduce(block).tobytes())
+
+    mx, my = means(x), means(y)
+    mxx, myy, mxy = (
+        means(_image_product(x, x)),
+        means(_image_product(y, y)),
+        means(_image_product(x, y)),
+    )
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    total = 0.0
+    for ux, uy, xx, yy, xy in zip(mx, my, mxx, myy, mxy):
+        vx = max(0.0, xx - ux * ux)
+        vy = max(0.0, yy - uy * uy)
+        cov = xy - ux * uy
+        total += ((2 * ux * uy + c1) * (2 * cov + c2)) / (
+            (ux * ux + uy * uy + c1) * (vx + vy + c2)
+        )
+    return total / max(1, len(mx))
+
+
+def write_variants(im, out_path: Path, policy=None) -> list:
+    # Encode im in each modern format next to out_path (e.g. name.png.webp) and
+    # keep an encoding only if it is smaller than out_path and at least as
+    # similar as policy["min_ssim"]. Returns manifest records for kept variants.
+    from PIL import Image
+
+    policy = policy or {}
+    variants = []
+    base_bytes = out_path.stat().st_size
+    min_ssim = policy.get("min_ssim", DEFAULT_MIN_SSIM)
+    has_alpha = im.mode in ("RGBA", "LA", "PA") or (
+        im.mode == "P" and "transparency" in im.info
+    )
+    rgb = im.convert("RGBA" if has_alpha else "RGB")
+    for fmt in policy.get("formats", []):
+        variant_path = out_path.with_name(f"{out_path.name}.{fmt}")
+        chosen = None
+        if out_path.suffix.lower() != f".{fmt}" and format_available(fmt):
+            for params in MODERN_FORMATS[fmt]:
+                buf = io.BytesIO()
+                rgb.save(buf, **params)
+                size = buf.tell()
+                if size >= base_bytes:
+                    continue
+                buf.seek(0)
+                with Image.open(buf) as decoded:
+                    score = 1.0 if params.get("lossless") else ssim(rgb, decoded)
+                if score >= min_ssim:
+                    chosen = (buf.getvalue(), score)
+                    break
+        if chosen is None:
+            # Not worth serving; make sure an older variant does not linger
+            variant_path.unlink(missing_ok=True)
+            continue
+        data, score = chosen
+        write_bytes_atomic(variant_path, data)
+        variants.append(
+            {
+                "format": fmt,
+                "path": rel(variant_path),
+                "bytes": len(data),
+                "ssim": round(score, 5),
+            }
+        )
+    return variants
+
+
+def _encode_png(im) -> bytes:
+    buf = io.BytesIO()
+    im.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def _stripped(im):
+    # Same pixels without ancillary chunks (text, ICC, EXIF, dpi, ...); only
+    # palette transparency is kept because it is part of the pixel data
+    clean = im.copy()
+    clean.info = {k: v for k, v in im.info.items() if k == "transparency"}
+    return clean
+
+
+def _exact_palette(im):
+    # Palette version of im if it has <= 256 colours and maps back bit-identically
+    from PIL import Image
+
+    colors = im.getcolors(256)
+    if colors is None:
+        return None
+    methods = [Image.Quantize.FASTOCTREE]
+    if im.mode != "RGBA":
+        methods.insert(0, Image.Quantize.MEDIANCUT)
+    base = im if im.mode in ("RGB", "RGBA") else im.convert("RGB")
+    for method in methods:
+        q = base.quantize(colors=len(colors), method=method, dither=Image.Dither.NONE)
+        if q.convert(im.mode).tobytes() == im.tobytes():
+            return q
+    return None
+
+
+def optimise_png(out_path: Path, im, tier: str, policy=None):
+    # Re-encode a PNG derivative as small as possible. Lossless candidates must
+    # decode to the exact same pixels; the quantised candidate is only tried for
+    # QUANT_TIERS and must stay within policy["quant_min_ssim"].
+    from PIL import Image
+
+    policy = policy or {}
+    if out_path.suffix.lower() != ".png" or not policy.get("png_optimise", True):
+        return None
+    if im.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+        return None
+    current = out_path.stat().st_size
+    clean = _stripped(im)
+    candidates = [("optimize", _encode_png(clean))]
+    if im.mode in ("L", "LA", "RGB", "RGBA"):
+        pal = _exact_palette(clean)
+        if pal is not None:
+            candidates.append(("palette", _encode_png(pal)))
+        elif tier in policy.get("quant_tiers", ()):
+            q = clean.convert("RGBA" if "A" in im.mode else "RGB").quantize(
+                colors=256, method=Image.Quantize.FASTOCTREE
+            )
+            if ssim(clean, q) >= policy.get("quant_min_ssim", DEFAULT_QUANT_MIN_SSIM):
+                candidates.append(("quantised", _encode_png(q)))
+    label, data = min(candidates, key=lambda c: len(c[1]))
+    if len(data) >= current:
+        return None
+    write_bytes_atomic(out_path, data)
+    print(f"Optimised {rel(out_path)}: {current} -> {len(data)} bytes ({label})")
+    return label
+
+
+def finish_output(im, out_path: Path, tier: str, policy=None) -> list:
+    # Post-generation stages for one written tier: PNG re-compression, then the
+    # modern-format variants (which then have to beat the optimised PNG)
+    optimise_png(out_path, im, tier, policy)
+    return write_variants(im, out_path, policy)
+
+
+def save_pyramid(src_path: Path, levels, memory_limit=None, policy=None):
+    # Decode the source once and derive each tier from the next larger one.
+    # levels: [(max_dim, out_path, tier)], any order. Target sizes are computed from the
+    # original dimensions so they match what a direct resize would produce.
+    # With memory_limit (bytes), sources whose decoded size exceeds it are handled
+    # in stages: JPEGs decode straight at the smallest scale libjpeg allows, and
+    # the full frame is released as soon as the first reduction exists.
+    from PIL import Image
+
+    levels = sorted(levels, key=lambda lv: lv[0], reverse=True)
+    results = {}
+    with Image.open(src_path) as src_im:
+        orig_size = src_im.size
+        targets = [tier_size(orig_size, max_dim) for max_dim, _, _ in levels]
+        largest = targets[0]
+        staged = (
+            memory_limit is not None
+            and orig_size[0] * orig_size[1] * len(src_im.getbands()) > memory_limit
+        )
+        if src_im.format == "JPEG" and largest != orig_size:
+            # Let libjpeg decode at 1/2..1/8 scale, keeping 2x headroom over the
+            # largest tier so the final LANCZOS pass still does the real filtering.
+            # Over budget, drop the headroom and decode as small as possible.
+            src_im.draft("RGB", largest if staged else draft_request(largest))
+        im = src_im
+        for (max_dim, out_path, tier), target in zip(levels, targets):
+            if im.size != target:
+                if staged and im is src_im:
+                    # Halve in integer steps while it stays above 2x the target,
+                    # then free the decoded original before the LANCZOS pass
+                    factor = max(1, min(im.size[0] // (target[0] * 2), im.size[1] // (target[1] * 2)))
+                    if factor > 1:
+                        im = im.reduce(factor)
+                        src_im.close()
+                # reducing_gap lets Pillow box-reduce by an integer factor first,
+                # which is far cheaper than LANCZOS over the full canvas
+                im = im.resize(target, Image.LANCZOS, reducing_gap=3.0)
+            # Ensure parents exist
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            save_image_atomic(im, out_path)
+            results[max_dim] = (im.size, finish_output(im, out_path, tier, policy))
+    return results
+
+
+def _gif_frames(im):
+    # Yields (RGBA frame, duration ms) with every frame fully composited
+    from PIL import ImageSequence
+
+    default = im.info.get("duration", 100)
+    for frame in ImageSequence.Iterator(im):
+        yield frame.convert("RGBA"), int(frame.info.get("duration", default) or 100)
+
+
+def _shared_palette(src: Path, target):
+    # One palette for the whole animation: quantise a montage of evenly sampled
+    # frames to 255 colours, leaving index 255 free for transparency
+    from PIL import Image
+
+    with Image.open(src) as im:
+        n = getattr(im, "n_frames", 1)
+        step = max(1, n // PALETTE_SAMPLE_FRAMES)
+        picks = set(range(0, n, step))
+        thumbs = []
+        has_alpha = False
+        for i, (frame, _) in enumerate(_gif_frames(im)):
+            if i not in picks:
+                continue
+            if frame.getextrema()[3][0] < 128:
+                has_alpha = True
+            thumbs.append(frame.convert("RGB").resize(target, Image.BOX))
+    montage = Image.new("RGB", (target[0], target[1] * len(thumbs)))
+    for i, t in enumerate(thumbs):
+        montage.paste(t, (0, i * target[1]))
+    return montage.quantize(colors=255, method=Image.Quantize.MEDIANCUT), has_alpha
+
+
+def _encode_frame(frame, palette, has_alpha):
+    from PIL import Image
+
+    # No dithering: dither noise differs frame to frame and defeats delta encoding
+    q = frame.convert("RGB").quantize(palette=palette, dither=Image.Dither.NONE)
+    if has_alpha:
+        q.paste(255, mask=frame.getchannel("A").point(lambda a: 255 if a < 128 else 0))
+    return q
+
+
+def optimise_gif(src: Path, targets: dict) -> dict:
+    # Re-encode an animated GIF at each target size: one shared palette, identical
+    # consecutive frames merged (durations summed), and Pillow writes each frame
+    # as the changed bounding box only. With transparency each frame is cleared
+    # to background before the next (disposal 2); leaving it in place would show
+    # the old frame through every transparent pixel of the new one.
+    # Returns {tier: (gif bytes, size, frames)}.
+    from PIL import Image
+
+    palettes = {tier: _shared_palette(src, size) for tier, size in targets.items()}
+    frames = {tier: [] for tier in targets}
+    durations = {tier: [] for tier in targets}
+    with Image.open(src) as im:
+        loop = im.info.get("loop", 0)
+        for frame, duration in _gif_frames(im):
+            scaled = frame
+            for tier, size in sorted(targets.items(), key=lambda t: -t[1][0]):
+                if scaled.size != size:
+                    scaled = scaled.resize(size, Image.LANCZOS, reducing_gap=3.0)
+                palette, has_alpha = palettes[tier]
+                q = _encode_frame(scaled, palette, has_alpha)
+                if frames[tier] and frames[tier][-1].tobytes() == q.tobytes():
+                    durations[tier][-1] += duration
+                    continue
+                frames[tier].append(q)
+                durations[tier].append(duration)
+    results = {}
+    for tier, fr in frames.items():
+        buf = io.BytesIO()
+        params = {"loop": loop, "optimize": True, "disposal": 1}
+        if palettes[tier][1]:
+            params.update(transparency=255, disposal=2)
+        if len(fr) > 1:
+            params.update(save_all=True, append_images=fr[1:], duration=durations[tier])
+        else:
+            params["duration"] = durations[tier][0]
+        fr[0].save(buf, format="GIF", **params)
+        results[tier] = (buf.getvalue(), targets[tier], len(fr))
+    return results
+
+
+def write_anim_fallbacks(gif_path: Path, policy=None) -> list:
+    # Animated WebP / MP4 next to an optimised GIF tier, recorded as variants so
+    # the manifest's "best" points at the lightest one
+    from PIL import Image
+
+    policy = policy or {}
+    variants = []
+    for fmt in policy.get("anim_fallbacks", []):
+        out = gif_path.with_name(f"{gif_path.name}.{fmt}")
+        try:
+            if fmt == "webp" and format_available("webp"):
+                with Image.open(gif_path) as im, atomic_output(out) as tmp:
+                    im.save(tmp, format="WEBP", save_all=True, quality=80, method=4)
+            elif fmt == "mp4" and ffmpeg_path():
+                with atomic_output(out) as tmp:
+                    subprocess.run(
+                        [
+                            ffmpeg_path(), "-y", "-loglevel", "error",
+                            "-i", str(gif_path),
+                            "-movflags", "faststart", "-pix_fmt", "yuv420p",
+                            "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+                            "-f", "mp4", str(tmp),
+                        ],
+                        check=True,
                     )
-                    out_path = out_dir / f"{stem}.png"
-                    out_img.save(out_path)
-                    print(f"Poster {size}px saved for {p.name} -> {out_path.name}")
+            else:
+                out.unlink(missing_ok=True)
+                continue
         except Exception as e:
-            print(f"Failed to create posters for {p.name}: {e}")
+            print(f"No {fmt} fallback for {gif_path.name}: {e}")
+            continue
+        variants.append({"format": fmt, "path": rel(out), "bytes": out.stat().st_size})
+    return variants
+
+
+def build_gif(src: Path, options=None) -> list:
+    from PIL import Image
+
+    options = options or {}
+    outputs = []
+    with Image.open(src) as im:
+        orig_size = im.size
+        try:
+            im.seek(0)
+        except Exception:
+            pass
+        # Posters from original GIF first frame at ULQ/LQ/HQ
+        poster = im.convert("RGBA")
+
+    # Animated tiers: HQ replaces the verbatim copy in compact_art, LQ goes to
+    # compact_art_lq. A source already within the tier that does not shrink is
+    # copied as-is instead.
+    gif_tiers = [(tier, size, out_dir) for tier, size, out_dir, _ in TIERS if tier in GIF_TIERS]
+    encoded = optimise_gif(src, {tier: tier_size(orig_size, size) for tier, size, _ in gif_tiers})
+    src_bytes = src.stat().st_size
+    for tier, size, out_dir in gif_tiers:
+        data, dims, n_frames = encoded[tier]
+        dest = out_dir / src.name
+        if tuple(dims) == orig_size and len(data) >= src_bytes:
+            copy_gif(src, dest)
+        else:
+            write_bytes_atomic(dest, data)
+            print(f"GIF {size}px for {src.name}: {src_bytes} -> {len(data)} bytes, {n_frames} frames")
+        outputs.append(output_record(f"gif_{tier}", dest, dims, write_anim_fallbacks(dest, options)))
+
+    return outputs + save_posters(poster, src, src.stem, options)
+
+
+def save_posters(poster, src: Path, stem: str, options=None) -> list:
+    from PIL import Image
+
+    # TIERS runs largest first, so each poster is reduced from the one above it
+    outputs = []
+    out_img = poster
+    for tier, size, _, out_dir in TIERS:
+        target = tier_size(poster.size, size)
+        if out_img.size != target:
+            out_img = out_img.resize(target, Image.LANCZOS, reducing_gap=3.0)
+        out_path = out_dir / f"{stem}.png"
+        save_image_atomic(out_img, out_path)
+        variants = finish_output(out_img, out_path, tier, options)
+        outputs.append(output_record(f"poster_{tier}", out_path, out_img.size, variants))
+        print(f"Poster {size}px saved for {src.name} -> {out_path.name}")
+    return outputs
+
+
+def sample_video(src: Path) -> list:
+    # Tiny greyscale frames spread over the video (POSTER_SAMPLE_FPS a
+    # second), as raw bytes, decoded by ffmpeg in one pass
+    ff = ffmpeg_path()
+    if not ff:
+        raise FileNotFoundError("ffmpeg not found (install it or set KEMELVOR_FFMPEG)")
+    w, h = POSTER_SAMPLE_SIZE
+    out = subprocess.run(
+        [
+            ff, "-v", "error", "-i", str(src),
+            "-vf", f"fps={POSTER_SAMPLE_FPS},scale={w}:{h}",
+            "-frames:v", str(POSTER_SAMPLE_FRAMES),
+            "-f", "rawvideo", "-pix_fmt", "gray", "-",
+        ],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        check=True,
+    ).stdout
+    n = w * h
+    return [out[i:i + n] for i in range(0, len(out) - n + 1, n)]
+
+
+def pick_poster_frame(samples) -> int:
+    # Prefer a sample that is well exposed (mean luma away from black and
+    # white, which passes over fades and blank title cards), detailed (wide
+    # luma spread) and steady (close to its neighbours, so not caught in the
+    # middle of a cut or a fade). Ties keep the earliest.
+    if not samples:
+        return 0
+    n = len(samples[0])
+    diffs = [sum(map(abs, map(sub, a, b))) / n for a, b in zip(samples, samples[1:])]
+    best, best_score = 0, -1.0
+    for i, s in enumerate(samples):
+        mean = sum(s) / n
+        spread = max(0.0, sum(map(mul, s, s)) / n - mean * mean) ** 0.5
+        exposure = max(0.0, 1.0 - ((mean - 128) / 128) ** 2)
+        near = diffs[max(0, i - 1):i + 1]
+        motion = min(near) if near else 0.0
+        score = exposure * spread / (1.0 + motion / 8)
+        if score > best_score:
+            best, best_score = i, score
+    return best
+
+
+def poster_cache_path(digest: str, cache=None) -> Path:
+    return (cache or cache_dir() / "posters") / f"{digest}-{POSTER_VERSION}.png"
+
+
+def video_poster(src: Path, digest: str, cache=None) -> Path:
+    # Full-size representative frame of a video as PNG, cached by the video's
+    # content hash so it is only searched for once (and is shared with the
+    # indexer's thumbnails)
+    out = poster_cache_path(digest, cache)
+    if out.exists():
+        return out
+    out.parent.mkdir(parents=True, exist_ok=True)
+    seconds = pick_poster_frame(sample_video(src)) / POSTER_SAMPLE_FPS
+    with atomic_output(out) as tmp:
+        subprocess.run(
+            [
+                ffmpeg_path(), "-v", "error", "-y", "-ss", f"{seconds:.3f}", "-i", str(src),
+                "-frames:v", "1", "-update", "1", "-f", "image2", "-c:v", "png", str(tmp),
+            ],
+            stdin=subprocess.DEVNULL,
+            check=True,
+        )
+        if tmp.stat().st_size == 0:
+            raise RuntimeError(f"no frame at {seconds:.3f}s in {src.name}")
+    return out
+
+
+_video_digests = {}
+
+
+def video_digest(src: Path) -> str:
+    # build_video and describe_source both need it; hash each video once
+    st = src.stat()
+    key = (str(src), st.st_size, st.st_mtime_ns)
+    if key not in _video_digests:
+        _video_digests[key] = file_digest(src)
+    return _video_digests[key]
+
+
+def build_video(src: Path, options=None) -> list:
+    # Poster tiers only; named after the whole file name, so they do not
+    # collide with the posters of a GIF exported from the same video
+    from PIL import Image
+
+    with Image.open(video_poster(src, video_digest(src))) as im:
+        poster = im.convert("RGB")
+    return save_posters(poster, src, src.name, options)
+
+
+def build_resized(src: Path, options=None) -> list:
+    # Generate ULQ/LQ/HQ resized images from original
+    options = options or {}
+    outputs = []
+    levels = save_pyramid(
+        src,
+        [(size, out_dir / src.name, tier) for tier, size, out_dir, _ in TIERS],
+        memory_limit=options.get("memory_limit"),
+        policy=options,
+    )
+    for tier, size, out_dir, _ in TIERS:
+        out_path = out_dir / src.name
+        dims, variants = levels[size]
+        outputs.append(output_record(tier, out_path, dims, variants))
+        print(f"Saved {tier.upper()} {size}px for {src.name}")
+    return outputs
+
+
+def build_derivatives(src: Path, options=None) -> list:
+    if src.suffix.lower() == ".gif":
+        return build_gif(src, options)
+    if src.suffix.lower() in VIDEO_EXTS:
+        return build_video(src, options)
+    return build_resized(src, options)
+
+
+def make_lqip(path: Path) -> str:
+    # Tiny data: URI placeholder the page can paint (blurred) before any tier loads
+    from PIL import Image
+
+    with Image.open(path) as im:
+        small = im.convert("RGBA").resize(tier_size(im.size, LQIP_SIZE), Image.BOX)
+    buf = io.BytesIO()
+    if format_available("webp"):
+        small.save(buf, format="WEBP", quality=40)
+        mime = "image/webp"
     else:
-        # Generate ULQ/LQ/HQ resized images from original
-        hq = compact / p.name
-        lq = compact_lq / p.name
-        ulq = compact_ulq / p.name
+        small.convert("P", palette=Image.Palette.ADAPTIVE, colors=32).save(buf, format="PNG", optimize=True)
+        mime = "image/png"
+    return f"data:{mime};base64,{base64.b64encode(buf.getvalue()).decode('ascii')}"
+
+
+def describe_source(src: Path, outputs: list) -> dict:
+    # Source dimensions and placeholder, so the page can lay out without loading images
+    from PIL import Image
+
+    if src.suffix.lower() in VIDEO_EXTS:
+        # Frame size, from the poster frame build_video just cached
+        src = video_poster(src, video_digest(src))
+    with Image.open(src) as im:
+        width, height = im.size
+    info = {"width": width, "height": height}
+    smallest = next(
+        (o for o in outputs if o["tier"] in ("ulq", "poster_ulq")), None
+    )
+    if smallest is not None:
+        info["lqip"] = make_lqip(src_root / smallest["path"])
+    return info
+
+
+def build_job(src: Path, options=None):
+    # Runs in a worker process: capture the per-file log so it can be printed in
+    # source order, and turn any failure into a result instead of killing the batch.
+    log = io.StringIO()
+    record = error = None
+    exact = reset_peak_rss()
+    with contextlib.redirect_stdout(log):
         try:
-            save_resized(src, 512, hq)
-            print(f"Saved HQ 512px for {p.name}")
-            save_resized(src, 256, lq)
-            print(f"Saved LQ 256px for {p.name}")
-            save_resized(src, 96, ulq)
-            print(f"Saved ULQ 96px for {p.name}")
+            outputs = build_derivatives(src, options)
+            record = {"outputs": outputs, **describe_source(src, outputs)}
         except Exception as e:
-            print(f"Failed to resize {p.name}: {e}")
+            error = f"{type(e).__name__}: {e}"
+    # Without a resettable high-water mark this is the worker's peak so far
+    memory = {"peak_rss": peak_rss(), "exact": exact}
+    return src.name, record, error, log.getvalue(), memory
+
+
+def run_jobs(jobs, workers: int, options=None, memory_budget=None):
+    # memory_budget (bytes) caps the estimated working set of all jobs in flight;
+    # each job also gets its share as a per-file limit for staged downsampling.
+    options = dict(options or {})
+    options["memory_limit"] = memory_budget // workers if memory_budget else None
+    if workers <= 1 or len(jobs) <= 1:
+        for src in jobs:
+            yield build_job(src, options)
+        return
+    estimates = dict.fromkeys(jobs, 0)
+    if memory_budget:
+        for src in jobs:
+            try:
+                estimates[src] = estimate_decoded_bytes(src)
+            except Exception:
+                pass  # unreadable; build_job reports the error
+        for src in jobs:
+            if estimates[src] > memory_budget:
+                print(
+                    f"{src.name}: needs ~{format_mb(estimates[src])} to decode, more than "
+                    f"the memory budget; it will run on its own"
+                )
+    workers = min(workers, len(jobs))
+    queue = deque(jobs)
+    running = {}
+    finished = {}
+    suspects = set()  # were running when a worker died; retried one at a time
+    in_flight = 0
+    next_idx = 0
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while queue or running:
+            # Admit jobs in order while their estimates fit the budget; a job larger
+            # than the whole budget waits for an idle pool and then runs alone.
+            while queue and len(running) < workers:
+                src = queue[0]
+                if running and (
+                    src in suspects
+                    or not suspects.isdisjoint(running.values())
+                    or (memory_budget and in_flight + estimates[src] > memory_budget)
+                ):
+                    break
+                queue.popleft()
+                running[pool.submit(build_job, src, options)] = src
+                in_flight += estimates[src]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for fut in done:
+                src = running.pop(fut)
+                in_flight -= estimates[src]
+                try:
+                    finished[src] = fut.result()
+                except BrokenProcessPool:
+                    broken = True
+                    running[fut] = src
+                    in_flight += estimates[src]
+            if broken:
+                # A worker died (e.g. OOM-killed) and took the pool with it. A job
+                # that was running alone is the culprit; otherwise each job that
+                # was in flight is retried alone to find out which one it was.
+                lost = sorted(running.values(), key=jobs.index)
+                running.clear()
+                in_flight = 0
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                if len(lost) == 1:
+                    finished[lost[0]] = (
+                        lost[0].name, None, "worker process died (out of memory?)", "",
+                        {"peak_rss": None, "exact": False},
+                    )
+                else:
+                    suspects.update(lost)
+                    queue.extendleft(reversed(lost))
+            # Yield in source order to keep output deterministic
+            while next_idx < len(jobs) and jobs[next_idx] in finished:
+                yield finished.pop(jobs[next_idx])
+                next_idx += 1
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate ULQ/LQ/HQ derivatives and GIF/MP4 posters from src/art."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="worker processes for derivative generation (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=None,
+        metavar="MB",
+        help="cap the estimated decode memory of all workers combined; large "
+        "sources are downsampled in stages and scheduled so the total stays under it",
+    )
+    parser.add_argument(
+        "--formats",
+        default=",".join(DEFAULT_FORMATS),
+        help="comma-separated modern formats to write next to each tier "
+        f"({', '.join(MODERN_FORMATS)}; empty to disable)",
+    )
+    parser.add_argument(
+        "--min-ssim",
+        type=float,
+        default=DEFAULT_MIN_SSIM,
+        help="lowest SSIM against the tier image for a modern encoding to be kept",
+    )
+    parser.add_argument(
+        "--anim-fallbacks",
+        default="",
+        help="comma-separated lighter encodings to write next to each animated "
+        f"GIF tier ({', '.join(ANIM_FALLBACKS)}; mp4 needs ffmpeg on PATH)",
+    )
+    parser.add_argument(
+        "--no-png-optimise",
+        dest="png_optimise",
+        action="store_false",
+        help="skip the lossless PNG re-compression stage",
+    )
+    parser.add_argument(
+        "--quant-min-ssim",
+        type=float,
+        default=DEFAULT_QUANT_MIN_SSIM,
+        help="lowest SSIM for a 256-colour palette PNG on the "
+        f"{'/'.join(t.upper() for t in QUANT_TIERS)} tiers",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    memory_budget = int(args.memory_budget * (1 << 20)) if args.memory_budget else None
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in MODERN_FORMATS]
+    if unknown:
+        raise SystemExit(f"Unknown format(s): {', '.join(unknown)}")
+    anim_fallbacks = [f.strip().lower() for f in args.anim_fallbacks.split(",") if f.strip()]
+    unknown = [f for f in anim_fallbacks if f not in ANIM_FALLBACKS]
+    if unknown:
+        raise SystemExit(f"Unknown animation fallback(s): {', '.join(unknown)}")
+    options = {
+        "formats": formats,
+        "anim_fallbacks": anim_fallbacks,
+        "min_ssim": args.min_ssim,
+        "png_optimise": args.png_optimise,
+        "quant_tiers": QUANT_TIERS,
+        "quant_min_ssim": args.quant_min_ssim,
+    }
+    ensure_dirs()
+    remove_stale_temps()
+    manifest = load_manifest()
+    entries = manifest["files"]
+    file_list = collect_sources()
+    names = {p.name for p in file_list}
+
+    # Drop derivatives whose source is gone. Only outputs recorded in the manifest
+    # are touched, so hand-placed files in the compact dirs are left alone.
+    for name in sorted(set(entries) - names):
+        print(f"Source {name} removed; deleting its derivatives...")
+        remove_outputs(entries.pop(name).get("outputs", []))
+
+    print("Generating resized images and posters (ULQ/LQ/HQ)...")
+    skipped = 0
+    pending = {}
+    for p in file_list:
+        prev = entries.get(p.name)
+        fingerprint = source_fingerprint(p, prev)
+        settings = settings_for(p, options)
+        if is_up_to_date(prev, fingerprint, settings):
+            skipped += 1
+            continue
+        pending[p.name] = (p, fingerprint, settings)
+
+    if pending and workers > 1:
+        print(f"Building {len(pending)} files with {workers} workers...")
+    built = 0
+    failures = []
+    jobs = [p for p, _, _ in pending.values()]
+    for name, record, error, log, memory in run_jobs(jobs, workers, options, memory_budget):
+        if log:
+            print(log, end="")
+        if memory["peak_rss"] is not None:
+            label = "peak RSS" if memory["exact"] else "worker peak RSS so far"
+            print(f"{name}: {label} {format_mb(memory['peak_rss'])}")
+        if error is not None:
+            print(f"Failed to build derivatives for {name}: {error}")
+            failures.append(name)
+            continue
+        _, fingerprint, settings = pending[name]
+        prev = entries.get(name)
+        if prev:
+            remove_outputs(prev.get("outputs", []), keep=list(output_paths(record["outputs"])))
+        entries[name] = {
+            **fingerprint,
+            "settings": settings,
+            **record,
+            "peak_rss": memory["peak_rss"],
+        }
+        built += 1
+        # Persist as we go so an interrupted run keeps the work already done
+        save_manifest(manifest)
+
+    save_manifest(manifest)
+    print(f"done! {built} built, {skipped} up to date, {len(failures)} failed")
+    for name in failures:
+        print(f"  failed: {name}")
+
 
-print("done!")
+if __name__ == "__main__":
+    main()
@@ -199,6 +199,49 @@ function progressiveUrlsForImage(url) {
     };
 }
 
+// Formats the browser can show in <img>; used to pick the lightest encoding
+// compact_art.py recorded for a tier. AVIF is probed once at startup.
+const SUPPORTED_VARIANTS = { webp: true, avif: false };
+(() => {
+    try {
+        const probe = new Image();
+        probe.onload = () => { SUPPORTED_VARIANTS.avif = probe.width > 0; };
+        probe.src = 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIAAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAKG1kYXQSAAoIGAAGiAhoNCAyEh7Hh4VZ3///4sAAAJA1jjx+rQ==';
+    } catch (_) { }
+})();
+
+function bestTierUrl(tier) {
+    // tier: { path, bytes, variants: { webp: n, avif: n } } from artlist.json
+    if (!tier || !tier.path) return null;
+    let url = `/src/${tier.path}`;
+    let best = Number.isFinite(tier.bytes) ? tier.bytes : Infinity;
+    Object.entries(tier.variants || {}).forEach(([fmt, bytes]) => {
+        if (SUPPORTED_VARIANTS[fmt] && bytes < best) {
+            best = bytes;
+            url = `/src/${tier.path}.${fmt}`;
+        }
+    });
+    return url;
+}
+
+function withTierUrls(urls, tiers, prefix = '') {
+    // Swap in the lightest recorded encodings where artlist.json has them
+    if (!tiers) return urls;
+    return {
+        ulq: bestTierUrl(tiers[`${prefix}ulq`]) || urls.ulq,
+        lq: bestTierUrl(tiers[`${prefix}lq`]) || urls.lq,
+        hq: bestTierUrl(tiers[`${prefix}hq`]) || urls.hq,
+    };
+}
+
+function wrapperWidthFor(wrapper, img) {
+    // Prefer the aspect ratio from artlist.json; fall back to the loaded image
+    const h = wrapper.clientHeight || parseFloat(getComputedStyle(wrapper).height) || 220;
+    const known = parseFloat(wrapper.dataset.ratio);
+    const ratio = known > 0 ? known : (img.naturalWidth / (img.naturalHeight || 1));
+    return Math.max(140, Math.round(h * ratio));
+}
+
 // --- Progressive upgrade observers (ULQ -> LQ -> HQ as you scroll) ---------
 let __LQ_OBSERVER__ = null;
 let __HQ_OBSERVER__ = null;
@@ -333,6 +376,13 @@ function formatBytes(bytes) {
     return `${val.toFixed(val >= 10 || i === 0 ? 0 : 1)} ${units[i]}`;
 }
 
+// Source byte size recorded in artlist.json, if any (saves a HEAD/Range probe)
+function knownFileSize(list, fname) {
+    if (!Array.isArray(list)) return null;
+    const item = list.find(it => it && it.fname === fname);
+    return item && Number.isFinite(item.bytes) ? item.bytes : null;
+}
+
 async function fetchFileSize(url) {
     // Try HEAD first
     try {
@@ -773,7 +823,7 @@ function openImageViewer({ fname, date, index = null, list = null, fromURL = fal
                 // Fallback: simple swap
                 img.src = url; progress.style.display = 'none';
                 // Update size meta
-                try { const size = await fetchFileSize(url); sizeEl.textContent = `Size: ${size ? formatBytes(size) : 'Unknown'}`; } catch (_) { }
+                try { const size = knownFileSize(list, decodeURI(url.split('/').pop())) ?? await fetchFileSize(url); sizeEl.textContent = `Size: ${size ? formatBytes(size) : 'Unknown'}`; } catch (_) { }
                 return;
             }
             const contentLength = Number(r.headers.get('Content-Length')) || 0;
@@ -816,7 +866,7 @@ function openImageViewer({ fname, date, index = null, list = null, fromURL = fal
 
     // Start size meta early
     (async () => {
-        try { const size = await fetchFileSize(fullUrl); sizeEl.textContent = `Size: ${size ? formatBytes(size) : 'Unknown'}`; } catch (_) { }
+        try { const size = knownFileSize(list, fname) ?? await fetchFileSize(fullUrl); sizeEl.textContent = `Size: ${size ? formatBytes(size) : 'Unknown'}`; } catch (_) { }
     })();
 
     if (!isGif) {
@@ -1090,12 +1140,7 @@ function ensureArtworkResizeHandler() {
             document.querySelectorAll('.artwork_image').forEach(wrapper => {
                 const img = wrapper.querySelector('img');
                 if (!img) return;
-                const h = wrapper.clientHeight || parseFloat(getComputedStyle(wrapper).height) || 220;
-                const w = img.naturalWidth;
-                const nH = img.naturalHeight || 1;
-                const ratio = w / nH;
-                const widthPx = Math.max(140, Math.round(h * ratio));
-                wrapper.style.width = `${widthPx}px`;
+                wrapper.style.width = `${wrapperWidthFor(wrapper, img)}px`;
             });
         };
     }
@@ -1105,6 +1150,33 @@ function ensureArtworkResizeHandler() {
     }
 }
 
+// Paged artlist (small index + content-hashed pages written by the indexer) when
+// present, so first paint only waits for page 1 and later pages come from cache.
+// Falls back to the single artlist.json; already rendered entries are deduped.
+async function loadArtlist(onBatch) {
+    try {
+        const r = await fetch('/src/art/artlist/index.json', { cache: 'no-store' });
+        if (r.ok) {
+            const index = await r.json();
+            if (index && Array.isArray(index.pages) && index.pages.length) {
+                const fetchPage = (page) => fetch(`/src/art/${page}`).then(res => {
+                    if (!res.ok) throw new Error(`artlist page ${page}: ${res.status}`);
+                    return res.json();
+                });
+                onBatch(await fetchPage(index.pages[0]));
+                // Fetch the rest in parallel but render in id order
+                const rest = index.pages.slice(1).map(fetchPage);
+                for (const page of rest) onBatch(await page);
+                return;
+            }
+        }
+    } catch (err) {
+        console.warn("Paged artlist unavailable, using artlist.json:", err);
+    }
+    const response = await fetch("/src/art/artlist.json", { cache: 'no-store' });
+    onBatch(await response.json());
+}
+
 function generateArtworks() {
     const container = document.getElementById("artwork_container");
     if (!container) return;
@@ -1134,9 +1206,8 @@ function generateArtworks() {
     renderedArtworkKeys.clear();
     artworksList = [];
 
-    artworksInitPromise = fetch("/src/art/artlist.json", { cache: 'no-store' })
-        .then(response => response.json())
-        .then(data => {
+    artworksInitPromise = Promise.resolve()
+        .then(() => loadArtlist(data => {
             if (!Array.isArray(data)) return; // defensive
             const observers = ensureProgressiveObservers();
             data.forEach(artwork => {
@@ -1145,7 +1216,7 @@ function generateArtworks() {
                 if (renderedArtworkKeys.has(key)) return; // skip duplicates
 
                 renderedArtworkKeys.add(key);
-                artworksList.push({ fname: artwork.fname, date: artwork.date });
+                artworksList.push({ fname: artwork.fname, date: artwork.date, bytes: artwork.bytes });
                 const div = document.createElement("div");
                 div.classList.add("artwork");
                 div.dataset.key = key;
@@ -1161,22 +1232,28 @@ function generateArtworks() {
                 // Whenever the image updates, refresh animation frame
                 img.addEventListener('load', scheduleScrollRefresh);
 
+                const tiers = artwork.tiers || null;
+                // With known dimensions the whole gallery is sized in the single
+                // resize pass below instead of once per image load
+                const knownRatio = (artwork.width > 0 && artwork.height > 0) ? artwork.width / artwork.height : 0;
+                if (knownRatio) wrapper.dataset.ratio = String(knownRatio);
+                if (artwork.lqip) {
+                    // Blurred placeholder until the first tier arrives
+                    img.style.background = `url("${artwork.lqip}") center / cover no-repeat`;
+                    img.addEventListener('load', () => { img.style.background = ''; }, { once: true });
+                }
                 const url = `/src/compact_art/${artwork.fname}`;
+                const playUrl = (tiers && bestTierUrl(tiers.gif_hq)) || url;
                 const setWrapperWidthFromImage = () => {
-                    const h = wrapper.clientHeight || parseFloat(getComputedStyle(wrapper).height) || 220;
-                    const w = img.naturalWidth;
-                    const nH = img.naturalHeight || 1;
-                    const ratio = w / nH;
-                    const widthPx = Math.max(140, Math.round(h * ratio));
-                    wrapper.style.width = `${widthPx}px`;
+                    wrapper.style.width = `${wrapperWidthFor(wrapper, img)}px`;
                 };
 
                 const idx = artworksList.length - 1;
                 wrapper.dataset.index = String(idx);
                 if (artwork.fname.toLowerCase().endsWith(".gif")) {
                     // Show poster frame with overlay; only load/play GIF on click
-                    const posterUrls = gifPosterUrlFromGif(url);
-                    img.addEventListener('load', setWrapperWidthFromImage, { once: true });
+                    const posterUrls = withTierUrls(gifPosterUrlFromGif(url), tiers, 'poster_');
+                    if (!knownRatio) img.addEventListener('load', setWrapperWidthFromImage, { once: true });
                     // Start ultra-low first for fast first paint
                     img.src = posterUrls.ulq;
                     img.dataset.ulq = posterUrls.ulq;
@@ -1203,7 +1280,7 @@ function generateArtworks() {
                         if (loaded) return;
                         loaded = true;
                         overlay.classList.add('loading');
-                        await PreloadManager.preload(url, 'high');
+                        await PreloadManager.preload(playUrl, 'high');
                         const tryLoad = (src) => new Promise((resolve) => {
                             let settled = false;
                             const timeout = setTimeout(() => {
@@ -1221,9 +1298,9 @@ function generateArtworks() {
                             img.src = src;
                         });
 
-                        let ok = await tryLoad(url);
+                        let ok = await tryLoad(playUrl);
                         if (!ok) {
-                            const busted = url + (url.includes('?') ? '&' : '?') + 'cb=' + Date.now();
+                            const busted = playUrl + (playUrl.includes('?') ? '&' : '?') + 'cb=' + Date.now();
                             ok = await tryLoad(busted);
                         }
                         overlay.remove();
@@ -1242,7 +1319,7 @@ function generateArtworks() {
                     const maybePreloadOnHover = () => {
                         if (!hoverPreloaded) {
                             hoverPreloaded = true;
-                            PreloadManager.preload(url, 'normal');
+                            PreloadManager.preload(playUrl, 'normal');
                         }
                     };
                     wrapper.addEventListener('mouseenter', maybePreloadOnHover, { passive: true });
@@ -1252,7 +1329,7 @@ function generateArtworks() {
                         const io = new IntersectionObserver((entries) => {
                             entries.forEach((entry) => {
                                 if (entry.isIntersecting || entry.intersectionRatio > 0) {
-                                    PreloadManager.preload(url, 'low');
+                                    PreloadManager.preload(playUrl, 'low');
                                     io.disconnect();
                                 }
                             });
@@ -1261,8 +1338,8 @@ function generateArtworks() {
                     }
                 } else {
                     // Progressive non-GIF images: ULQ -> LQ -> HQ
-                    const p = progressiveUrlsForImage(url);
-                    img.addEventListener('load', setWrapperWidthFromImage, { once: true });
+                    const p = withTierUrls(progressiveUrlsForImage(url), tiers);
+                    if (!knownRatio) img.addEventListener('load', setWrapperWidthFromImage, { once: true });
                     // Eager paint with ULQ, upgrade via observers near/in viewport
                     img.src = p.ulq;
                     img.dataset.ulq = p.ulq;
@@ -1291,6 +1368,14 @@ function generateArtworks() {
                 const animator = ensureScrollAnimator();
                 animator.add(wrapper);
             });
+            // Size this batch right away so the first page paints before the rest arrive
+            ensureArtworkResizeHandler();
+            requestAnimationFrame(() => {
+                artworkResizeHandler && artworkResizeHandler();
+                scheduleScrollRefresh();
+            });
+        }))
+        .then(() => {
             // Mark as loaded and set up resize handling once
             artworksLoaded = true;
             ensureArtworkResizeHandler();
@@ -0,0 +1,189 @@
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import compact_art  # noqa: E402
+from PIL import Image, ImageSequence, PngImagePlugin  # noqa: E402
+
+
+def _sandbox(tmp_path, monkeypatch):
+    # Point src/ (sources, derivative dirs, manifest) and the user cache into tmp_path
+    root = tmp_path / "src"
+    monkeypatch.setattr(compact_art, "src_root", root)
+    for name in ("art", "compact", "posters", "compact_lq", "compact_ulq", "posters_lq", "posters_ulq"):
+        monkeypatch.setattr(compact_art, name, root / getattr(compact_art, name).name)
+    monkeypatch.setattr(compact_art, "manifest_path", root / "compact_manifest.json")
+    monkeypatch.setattr(
+        compact_art,
+        "TIERS",
+        [(tier, size, root / out.name, root / post.name) for tier, size, out, post in compact_art.TIERS],
+    )
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(sys, "argv", ["compact_art.py"])
+    compact_art.ensure_dirs()
+    return root
+
+
+def _noise(size, seed=0):
+    rnd = random.Random(seed)
+    return Image.frombytes("RGB", size, bytes(rnd.randrange(256) for _ in range(size[0] * size[1] * 3)))
+
+
+def test_manifest_skips_unchanged_and_deletes_orphans(tmp_path, monkeypatch, capsys):
+    root = _sandbox(tmp_path, monkeypatch)
+    Image.new("RGB", (600, 300), (10, 120, 200)).save(compact_art.art / "a.png")
+    Image.new("RGB", (300, 600), (200, 120, 10)).save(compact_art.art / "b.png")
+    compact_art.main()
+    assert "2 built, 0 up to date" in capsys.readouterr().out
+    files = json.loads(compact_art.manifest_path.read_text())["files"]
+    assert set(files) == {"a.png", "b.png"}
+    b_outputs = [root / o["path"] for o in files["b.png"]["outputs"]]
+    assert b_outputs and all(p.exists() for p in b_outputs)
+
+    # Nothing changed: nothing rebuilt
+    compact_art.main()
+    assert "0 built, 2 up to date" in capsys.readouterr().out
+
+    # A removed source takes its recorded outputs along, and only those
+    hand_placed = compact_art.compact / "hand.png"
+    hand_placed.write_bytes(b"not from the manifest")
+    (compact_art.art / "b.png").unlink()
+    compact_art.main()
+    assert "0 built, 1 up to date" in capsys.readouterr().out
+    assert not any(p.exists() for p in b_outputs)
+    assert hand_placed.exists()
+    assert set(json.loads(compact_art.manifest_path.read_text())["files"]) == {"a.png"}
+
+    # New content under the same name is rebuilt, as is a deleted output
+    Image.new("RGB", (600, 300), (10, 200, 120)).save(compact_art.art / "a.png")
+    compact_art.main()
+    assert "1 built, 0 up to date" in capsys.readouterr().out
+    (compact_art.compact_ulq / "a.png").unlink()
+    compact_art.main()
+    assert "1 built, 0 up to date" in capsys.readouterr().out
+
+
+def _dies_on_boom(src, options=None):
+    # Stand-in for build_job: "boom" files take their worker down like the OOM killer
+    if "boom" in src.name:
+        os._exit(9)
+    return src.name, {"outputs": []}, None, "", {"peak_rss": None, "exact": False}
+
+
+def test_dead_worker_fails_only_its_own_file(monkeypatch):
+    monkeypatch.setattr(compact_art, "build_job", _dies_on_boom)
+    jobs = [Path(f"{name}.png") for name in ("a", "b", "boom", "c", "d", "e")]
+    results = list(compact_art.run_jobs(jobs, workers=3))
+    assert [r[0] for r in results] == [p.name for p in jobs]
+    failed = [r[0] for r in results if r[2] is not None]
+    assert failed == ["boom.png"]
+
+
+def test_pyramid_tiers_match_direct_resize_sizes(tmp_path, monkeypatch, capsys):
+    root = _sandbox(tmp_path, monkeypatch)
+    sources = {
+        "wide.png": (1001, 333),
+        "tall.jpg": (517, 1999),
+        "small.png": (80, 60),  # below every tier but ULQ: never upscaled
+    }
+    for name, size in sources.items():
+        _noise(size).save(compact_art.art / name)
+    compact_art.main()
+    files = json.loads(compact_art.manifest_path.read_text())["files"]
+    for name, size in sources.items():
+        outputs = {o["tier"]: o for o in files[name]["outputs"]}
+        for tier, max_dim, out_dir, _ in compact_art.TIERS:
+            expected = compact_art.tier_size(size, max_dim)
+            assert tuple(outputs[tier]["size"]) == expected, (name, tier)
+            with Image.open(out_dir / name) as im:
+                assert im.size == expected, (name, tier)
+
+
+def test_variants_are_kept_only_when_smaller_and_similar(tmp_path, monkeypatch):
+    if not compact_art.format_available("webp"):
+        pytest.skip("Pillow built without WebP")
+    _sandbox(tmp_path, monkeypatch)
+    im = _noise((128, 128)).resize((256, 256), Image.BILINEAR)
+    out = compact_art.compact / "n.png"
+    im.save(out)
+    assert compact_art.ssim(im, im) == pytest.approx(1.0)
+    assert compact_art.ssim(im, Image.new("RGB", im.size, (128, 128, 128))) < 0.2
+
+    strict = compact_art.write_variants(im, out, {"formats": ["webp"], "min_ssim": 1.01})
+    assert strict == []
+    assert not (compact_art.compact / "n.png.webp").exists()
+
+    loose = compact_art.write_variants(im, out, {"formats": ["webp"], "min_ssim": 0.5})
+    assert [v["format"] for v in loose] == ["webp"]
+    variant = compact_art.compact / "n.png.webp"
+    assert loose[0]["bytes"] == variant.stat().st_size < out.stat().st_size
+    with Image.open(variant) as decoded:
+        assert compact_art.ssim(im, decoded) == pytest.approx(loose[0]["ssim"], abs=1e-4)
+    assert loose[0]["ssim"] >= 0.5
+
+    # A later, stricter run drops the variant it can no longer justify
+    assert compact_art.write_variants(im, out, {"formats": ["webp"], "min_ssim": 1.01}) == []
+    assert not variant.exists()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "P"])
+def test_optimise_png_keeps_pixels(tmp_path, monkeypatch, mode):
+    _sandbox(tmp_path, monkeypatch)
+    rnd = random.Random(mode)
+    # Few colours (palette candidate) and a noisy strip (many colours)
+    im = Image.new("RGBA", (160, 120), (0, 0, 0, 0))
+    for _ in range(40):
+        x, y = rnd.randrange(150), rnd.randrange(110)
+        im.paste((rnd.randrange(4) * 80, 40, 200, rnd.choice((0, 128, 255))), (x, y, x + 10, y + 10))
+    if mode != "P":
+        im.paste(_noise((160, 20), seed=1).convert("RGBA"), (0, 100))
+    im = im.convert(mode) if mode != "P" else im.convert("RGB").quantize(16)
+    out = compact_art.compact / f"{mode}.png"
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Comment", "x" * 4000)
+    im.save(out, pnginfo=info, compress_level=0)
+
+    before = out.stat().st_size
+    label = compact_art.optimise_png(out, im, "hq", {})
+    assert label is not None
+    assert out.stat().st_size < before
+    with Image.open(out) as optimised:
+        assert "Comment" not in optimised.info
+        assert optimised.convert("RGBA").tobytes() == im.convert("RGBA").tobytes()
+
+
+def _alpha_masks(path_or_buf):
+    with Image.open(path_or_buf) as im:
+        return [
+            frame.convert("RGBA").getchannel("A").point(lambda a: 255 if a >= 128 else 0).tobytes()
+            for frame in ImageSequence.Iterator(im)
+        ]
+
+
+def test_transparent_animation_keeps_alpha_per_frame(tmp_path):
+    # A square moving across a transparent canvas: every frame after the first
+    # must be transparent where the square used to be
+    size = (96, 64)
+    frames = []
+    for i in range(8):
+        im = Image.new("RGBA", size, (0, 0, 0, 0))
+        im.paste((200, 40, 40, 255), (i * 8, 10, i * 8 + 24, 34))
+        frames.append(im)
+    src = tmp_path / "moving.gif"
+    frames[0].save(src, save_all=True, append_images=frames[1:], duration=80, loop=0, disposal=2)
+
+    data, out_size, n = compact_art.optimise_gif(src, {"full": size})["full"]
+    out = tmp_path / "out.gif"
+    out.write_bytes(data)
+
+    expected = _alpha_masks(src)
+    got = _alpha_masks(out)
+    assert n == len(expected) == len(got)
+    for i, (e, g) in enumerate(zip(expected, got)):
+        assert g == e, f"frame {i}: alpha differs in {sum(a != b for a, b in zip(e, g))} pixels"
@@ -0,0 +1,772 @@
+import bz2
+import gzip
+import hashlib
+import io
+import itertools
+import lzma
+import os
+import random
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import indexer  # noqa: E402
+
+
+def test_truncated_artlist_page_is_rewritten(tmp_path):
+    data = [{"id": i, "title": f"t{i}", "fname": f"f{i}.png"} for i in range(100)]
+    pages = indexer.save_artlist_pages(tmp_path, data)
+    first = tmp_path / pages[0]
+    body = first.read_bytes()
+    first.write_bytes(body[: len(body) // 2])  # interrupted write
+
+    assert indexer.save_artlist_pages(tmp_path, data) == pages
+    assert first.read_bytes() == body
+    assert not list((tmp_path / indexer.ARTLIST_PAGES_DIR).glob("*.tmp"))
+
+
+def test_disk_thumb_store_evicts_least_recently_used(tmp_path):
+    store = indexer.DiskThumbStore(tmp_path, budget_bytes=1000)
+    for i, key in enumerate("abc"):
+        store.put(key, bytes(300))
+        os.utime(store._path(key), (1000 + i, 1000 + i))
+    assert store.get("a") == bytes(300)  # now the most recently used
+
+    store.put("d", bytes(300))  # 1200 bytes: back under 900 by dropping b
+    assert store.get("b") is None
+    assert all(store.get(k) is not None for k in "acd")
+
+    # A new session finds the same entries and keeps the same total
+    store = indexer.DiskThumbStore(tmp_path, budget_bytes=1000)
+    os.utime(store._path("c"), (1000, 1000))
+    store.put("e", bytes(300))
+    assert store.get("c") is None
+    assert all(store.get(k) is not None for k in "ade")
+
+    # An entry bigger than the whole budget still survives its own put
+    store.put("big", bytes(2000))
+    assert store.get("big") is not None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["big.png"]
+
+
+def _zip(path: Path, members: Dict[str, bytes]) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def _tar(path: Path, members: Dict[str, bytes], mode: str = "w") -> Path:
+    with tarfile.open(path, mode) as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1_600_000_000
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+def test_archive_pool_reuses_and_evicts_handles(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    paths = [str(_zip(tmp_path / f"a{i}.zip", {"x.png": f"zip {i}".encode()})) for i in range(3)]
+    tar = str(_tar(tmp_path / "t.tar", {"d/y.png": b"tar member"}))
+    pool = indexer.ArchivePool(max_open=2)
+    try:
+        assert pool.read("zip", paths[0], "x.png") == b"zip 0"
+        first = pool._handles[("zip", paths[0])]
+        assert pool.read("zip", paths[0], "x.png") == b"zip 0"
+        assert pool._handles[("zip", paths[0])] is first
+        assert pool.read("tar", tar, "d/y.png") == b"tar member"
+
+        # Pinned entries outlive eviction until their last user is done
+        entry = pool._acquire("zip", paths[1])
+        assert pool.read("zip", paths[2], "x.png") == b"zip 2"
+        assert pool.read("zip", paths[0], "x.png") == b"zip 0"
+        assert ("zip", paths[1]) not in pool._handles and entry.evicted
+        assert len(pool._handles) == 2
+        assert entry.handle.read("x.png") == b"zip 1"
+        pool._release(entry)
+        assert entry.handle.zf.fp is None
+
+        # A rewritten archive is reopened
+        _zip(Path(paths[0]), {"x.png": b"rewritten"})
+        st = os.stat(paths[0])
+        os.utime(paths[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert pool.read("zip", paths[0], "x.png") == b"rewritten"
+    finally:
+        pool.close_all()
+    assert not pool._handles
+
+
+def _tar_members(seed: int, count: int) -> Dict[str, bytes]:
+    # Text-like members (long matches, dynamic Huffman blocks) and noise
+    # (stored blocks), of mixed sizes
+    rnd = random.Random(seed)
+    words = [bytes(rnd.choice(b"abcdefghij") for _ in range(rnd.randint(2, 8))) for _ in range(400)]
+    members = {}
+    for i in range(count):
+        size = rnd.choice((0, 100, 5000, 70000, 400000))
+        if i % 3:
+            data = b" ".join(rnd.choice(words) for _ in range(size // 5))
+        else:
+            data = rnd.randbytes(size)
+        members[f"m{i:02d}.bin"] = data
+    return members
+
+
+@pytest.mark.parametrize("kind", ["plain", "gz", "gz-members", "bz2", "xz-streams"])
+def test_tar_reader_matches_tarfile(tmp_path, monkeypatch, kind):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    # Small spacings, so a few MB exercise snapshots and restart points
+    monkeypatch.setattr(indexer, "GZ_SNAPSHOT_EVERY", 256 << 10)
+    monkeypatch.setattr(indexer, "GZ_RESTART_EVERY", 512 << 10)
+    members = _tar_members(14, 30)
+    raw = _tar(tmp_path / "raw.tar", members).read_bytes()
+    path = tmp_path / "a.tar"
+    if kind == "plain":
+        path.write_bytes(raw)
+    elif kind == "gz":
+        path.write_bytes(gzip.compress(raw, 6))
+    elif kind == "gz-members":
+        # Concatenated members, as pigz or appending with gzip produces
+        parts = [raw[i:i + (1 << 20)] for i in range(0, len(raw), 1 << 20)]
+        path.write_bytes(b"".join(gzip.compress(p) for p in parts))
+    elif kind == "bz2":
+        path.write_bytes(bz2.compress(raw))
+    else:
+        # One xz stream per half: several blocks to seek between
+        half = len(raw) // 2
+        path.write_bytes(lzma.compress(raw[:half]) + lzma.compress(raw[half:]))
+
+    with tarfile.open(path) as tf:
+        expected = {m.name: tf.extractfile(m).read() for m in tf}
+    assert expected == members
+    names = list(members)
+    random.Random(1).shuffle(names)
+
+    reader = indexer.TarReader(str(path))
+    try:
+        if kind == "gz":
+            assert reader.index["restarts"]
+        for name in names:
+            assert reader.read(name) == members[name], name
+    finally:
+        reader.close()
+
+    # Cold: a fresh reader works from the sidecar alone
+    assert indexer.load_tar_index(str(path)) is not None
+    for name in reversed(names):
+        reader = indexer.TarReader(str(path))
+        try:
+            assert reader.read(name) == members[name], name
+            assert b"".join(reader.chunks(name, 3000)) == members[name], name
+        finally:
+            reader.close()
+
+
+def test_scan_archive_cache_follows_the_archive(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(indexer, "_listings", {})
+    path = _tar(tmp_path / "art.tar", {"a.png": b"1" * 100, "b.png": b"2" * 100})
+    real_scan = indexer.scan_tar_archive
+    scans = []
+
+    def counting_scan(p):
+        scans.append(p)
+        return real_scan(p)
+
+    monkeypatch.setattr(indexer, "scan_tar_archive", counting_scan)
+
+    def names():
+        return sorted(item["fname"] for item in indexer.scan_archive(path))
+
+    assert names() == ["a.png", "b.png"]
+    assert names() == ["a.png", "b.png"]  # from memory
+    monkeypatch.setattr(indexer, "_listings", {})
+    assert names() == ["a.png", "b.png"]  # from the user cache
+    assert len(scans) == 1
+
+    # Rewritten in place with the same size and mtime: the hashed ends differ
+    st = path.stat()
+    _tar(path, {"a.png": b"1" * 100, "c.png": b"3" * 100})
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert path.stat().st_size == st.st_size
+    assert names() == ["a.png", "c.png"]
+    assert len(scans) == 2
+
+
+requires_qt = pytest.mark.skipif(indexer.QtWidgets is None, reason="needs PySide6")
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return indexer.QtWidgets.QApplication.instance() or indexer.QtWidgets.QApplication([])
+
+
+def _wait(predicate, timeout: float = 10.0) -> None:
+    # Runs the Qt event loop until predicate() holds
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        indexer.QtCore.QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+
+@requires_qt
+def test_scan_engine_reports_sources_in_order(qapp):
+    def job(name, delay):
+        def run():
+            time.sleep(delay)
+            if name == "broken":
+                raise OSError("unreadable archive")
+            return [{"fname": f"{name}.png"}]
+        return run
+
+    engine = indexer.ScanEngine(max_workers=3)
+    batches, finished = [], []
+    engine.batch.connect(lambda gen, items: batches.append((gen, items)))
+    engine.finished.connect(finished.append)
+    try:
+        engine.start([job("stale", 0.3)])
+        gen = engine.start([job("a", 0.2), job("b", 0), job("broken", 0.1), job("c", 0.05)])
+        _wait(lambda: finished)
+        time.sleep(0.4)  # let the superseded scan finish too
+        indexer.QtCore.QCoreApplication.processEvents()
+        assert finished == [gen]
+        assert batches == [
+            (gen, [{"fname": "a.png"}]),
+            (gen, [{"fname": "b.png"}]),
+            (gen, []),
+            (gen, [{"fname": "c.png"}]),
+        ]
+        gen = engine.start([])
+        _wait(lambda: finished[-1] == gen)
+    finally:
+        engine.shutdown()
+
+
+def _art(i: int, title: str, fname: Optional[str] = None, featured: bool = False) -> "indexer.Artwork":
+    return indexer.Artwork(fname=fname or f"img{i:04d}.png", id=i, date=float(i), title=title, featured=featured)
+
+
+def _titles(model) -> List[str]:
+    return [model.artwork(row).title for row in range(model.rowCount())]
+
+
+@requires_qt
+def test_art_model_edits_and_drag_drop(qapp):
+    Qt = indexer.QtCore.Qt
+    arts = [_art(i, f"t{i}", featured=i in (1, 3)) for i in range(5)]
+    model = indexer.ArtModel()
+    model.set_artworks(arts)
+    edited, changed, reordered = [], [], []
+    model.artwork_edited.connect(lambda row, role: edited.append((row, role)))
+    model.dataChanged.connect(lambda top, bottom, roles: changed.append((top.row(), bottom.row())))
+    model.order_changed.connect(lambda: reordered.append(True))
+
+    assert model.data(model.index(1, 0)) == "t1  ★1\nimg0001.png"
+    assert model.data(model.index(3, 0)) == "t3  ★2\nimg0003.png"
+    assert model.data(model.index(1, 0), Qt.EditRole) == "t1"
+    assert model.data(model.index(1, 0), Qt.UserRole + 2) is arts[1]
+
+    # The editor hands back the display text; only the title is taken
+    assert model.setData(model.index(1, 0), "renamed  ★1\nimg0001.png", Qt.EditRole)
+    assert arts[1].title == "renamed"
+    assert changed == [(1, 1)]
+
+    # Featuring row 0 pushes every featured row below it down a rank
+    assert model.setData(model.index(0, 0), Qt.Checked, Qt.CheckStateRole)
+    assert arts[0].featured
+    assert model.data(model.index(3, 0)) == "t3  ★3\nimg0003.png"
+    assert edited == [(1, int(Qt.EditRole)), (0, int(Qt.CheckStateRole))]
+
+    # Dropping rows 0 and 4 before row 2 moves them there, in order
+    mime = model.mimeData([model.index(0, 0), model.index(4, 0)])
+    assert model.dropMimeData(mime, Qt.MoveAction, 2, 0, indexer.QtCore.QModelIndex()) is False
+    assert _titles(model) == ["renamed", "t0", "t4", "t2", "t3"]
+    assert reordered == [True]
+    assert [model.featured_rank(row) for row in range(5)] == [1, 2, None, None, 3]
+
+    assert model.removeRows(1, 2)
+    assert _titles(model) == ["renamed", "t2", "t3"]
+    assert model.data(model.index(2, 0)) == "t3  ★2\nimg0003.png"
+    assert [(a.id, a.featured_rank) for a in model.artworks()] == [(1, 1), (2, None), (3, 2)]
+
+
+def test_featured_ranks_match_a_recount():
+    rnd = random.Random(18)
+    flags = [rnd.random() < 0.3 for _ in range(300)]
+    ranks = indexer.FeaturedRanks(flags)
+
+    def check():
+        expected = list(itertools.accumulate(flags))
+        assert ranks.total == sum(flags) and len(ranks) == len(flags)
+        for pos, f in enumerate(flags):
+            assert ranks.rank(pos) == (expected[pos] if f else None)
+        featured = [pos for pos, f in enumerate(flags) if f]
+        for k, pos in enumerate(featured, start=1):
+            assert ranks.select(k) == pos
+        assert ranks.select(0) == ranks.select(len(featured) + 1) == -1
+
+    check()
+    for _ in range(400):
+        op = rnd.random()
+        if op < 0.4:
+            pos = rnd.randrange(len(flags))
+            value = rnd.random() < 0.5
+            assert ranks.set(pos, value) == (flags[pos] != value)
+            flags[pos] = value
+        elif op < 0.8:
+            src, dst = rnd.randrange(len(flags)), rnd.randrange(len(flags))
+            ranks.move(src, dst)
+            flags.insert(dst, flags.pop(src))
+        else:
+            value = rnd.random() < 0.5
+            ranks.append(value)
+            flags.append(value)
+        if rnd.random() < 0.1:
+            check()
+    check()
+
+
+def test_search_index_matches_substrings():
+    arts = [
+        _art(0, "Straße bei Nacht"),
+        _art(1, "STRASSE"),
+        _art(2, "Sunset", "sun_01.jpg"),
+        _art(3, "ab", "x.gif"),
+        _art(4, "title", "ab"),
+    ]
+    index = indexer.SearchIndex()
+    for a in arts:
+        index.update(a)
+
+    def found(query):
+        return sorted(arts[slot].id for slot in index.search(query))
+
+    assert index.search("  ") is None
+    assert found("STRASSE") == [0, 1]  # casefolded: ß matches ss
+    assert found("nacht") == [0]
+    assert found("sun_0") == [2]
+    assert found("ab") == [3, 4]  # under three characters: plain substring test
+    assert found("a") == [0, 1, 3, 4]
+    assert found("sun") == [2]
+    assert found("eab") == []  # never across title and file name
+    assert found("zzz") == []
+
+    arts[2].title = "Sunrise"
+    index.update(arts[2])
+    assert found("sunset") == []
+    assert found("rise") == [2]
+    assert index.slot(arts[2]) == 2 and len(index) == 5
+
+
+@requires_qt
+def test_filter_model_follows_source_changes(qapp):
+    Qt = indexer.QtCore.Qt
+    arts = [_art(i, "cat" if i % 3 == 0 else "dog", featured=i % 2 == 0) for i in range(30)]
+    model = indexer.ArtModel()
+    model.set_artworks(arts)
+    index = indexer.SearchIndex()
+    for a in arts:
+        index.update(a)
+    proxy = indexer.ArtFilterModel(model, index)
+
+    def shown():
+        return [proxy.data(proxy.index(r, 0), Qt.UserRole + 2).id for r in range(proxy.rowCount())]
+
+    def expected(matches, featured_only):
+        slots = None if matches is None else set(matches)
+        return [
+            a.id for a in model.iter_artworks()
+            if (slots is None or index.slot(a) in slots) and (a.featured or not featured_only)
+        ]
+
+    matches = index.search("cat")
+    proxy.set_filter(matches, False)
+    assert shown() == expected(matches, False) == list(range(0, 30, 3))
+    kept = indexer.QtCore.QPersistentModelIndex(proxy.index(0, 0))
+    kept_art = kept.data(Qt.UserRole + 2)
+    assert kept_art.featured
+
+    def check(featured_only=False):
+        assert shown() == expected(matches, featured_only)
+        assert kept.isValid() and kept.data(Qt.UserRole + 2) is kept_art
+
+    model.sort_rows(lambda r: -r.art.id)
+    check()
+    model.move_row(0, 20)
+    check()
+
+    # Rows streaming in shift the rows after them; new rows wait for the
+    # next search before they show
+    for row, i in ((0, 100), (5, 101), (model.rowCount(), 102), (12, 103)):
+        model.add_artwork_item(_art(i, "cat"), row)
+        check()
+    for a in model.iter_artworks():
+        index.update(a)
+    matches = index.search("cat")
+    proxy.set_filter(matches, False)
+    assert {100, 101, 102, 103} <= set(shown())
+    check()
+
+    assert model.removeRows(2, 6)
+    check()
+
+    # Featured only, no search: a featured row shows as soon as it lands
+    matches = None
+    proxy.set_filter(None, True)
+    check(True)
+    model.add_artwork_item(_art(200, "new", featured=True), 3)
+    model.add_artwork_item(_art(201, "new", featured=False), 3)
+    check(True)
+    assert 200 in shown() and 201 not in shown()
+
+    proxy.set_filter(None, False)
+    assert shown() == [a.id for a in model.iter_artworks()]
+
+
+@requires_qt
+def test_sort_rows_keeps_rows_selection_and_ranks(qapp):
+    titles = ["pear", "Apple", "fig", "apple", "kiwi", "Fig"]
+    arts = [_art(i, t, featured=i in (0, 2, 5)) for i, t in enumerate(titles)]
+    model = indexer.ArtModel()
+    model.set_artworks(arts)
+    texts = [model.data(model.index(row, 0)) for row in range(len(arts))]
+    selected = [indexer.QtCore.QPersistentModelIndex(model.index(row, 0)) for row in (0, 4)]
+
+    model.sort_rows(attrgetter("title_key"))
+    # Stable: equal keys keep their order
+    assert _titles(model) == ["Apple", "apple", "fig", "Fig", "kiwi", "pear"]
+    assert [model.artwork(p.row()) for p in selected] == [arts[0], arts[4]]
+    assert [model.featured_rank(row) for row in range(6)] == [None, None, 1, 2, None, 3]
+    assert model.data(model.index(2, 0)) == "fig  ★1\nimg0002.png" != texts[2]
+
+    # Reverse sorts are stable too: featured first, in their current order
+    model.sort_rows(attrgetter("art.featured"), reverse=True)
+    assert _titles(model) == ["fig", "Fig", "pear", "Apple", "apple", "kiwi"]
+    assert [model.featured_rank(row) for row in range(6)] == [1, 2, 3, None, None, None]
+    assert [model.artwork(p.row()) for p in selected] == [arts[0], arts[4]]
+
+
+@requires_qt
+def test_preview_cache_decodes_to_the_pane(qapp, tmp_path, monkeypatch):
+    from PIL import Image
+
+    QSize = indexer.QtCore.QSize
+    Image.new("RGB", (2000, 1000), (200, 30, 30)).save(tmp_path / "big.jpg")
+    Image.new("RGB", (2000, 1000), (30, 200, 30)).save(tmp_path / "big.png")
+    Image.new("RGB", (100, 50), (30, 30, 200)).save(tmp_path / "small.png")
+    assert indexer.PreviewCache.box_for(QSize(300, 200)) == 512
+    assert indexer.PreviewCache.box_for(QSize(256, 10)) == 256
+
+    cache = indexer.PreviewCache(tmp_path, max_items=2)
+    for name in ("big.jpg", "big.png"):
+        art = _art(0, name, name)
+        img = cache.image(art, 512)
+        assert (img.width(), img.height()) == (512, 256), name
+        key = cache.key(art)
+        assert cache.get(key, 512) is img
+        assert cache.get(key, 256) is img
+        assert cache.get(key, 1024) is None  # a bigger pane needs a sharper decode
+
+    # Shown at full size: good for any pane
+    small = _art(1, "small", "small.png")
+    img = cache.image(small, 256)
+    assert (img.width(), img.height()) == (100, 50)
+    assert cache.get(cache.key(small), 4096) is img
+    assert len(cache.items) == 2  # big.jpg dropped first
+
+    # A late, blurrier decode does not replace a sharper one
+    big = _art(0, "big.png", "big.png")
+    key = cache.key(big)
+    sharp = cache.image(big, 1024)
+    blurry, full = cache.decode(big, 256)
+    cache.put(key, blurry, 256, full)
+    assert cache.get(key, 1024) is sharp
+
+    # Archive members decode from the shared archive pool
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    buf = io.BytesIO()
+    Image.new("RGB", (1200, 600), (1, 2, 3)).save(buf, format="PNG")
+    zpath = _zip(tmp_path / "a.zip", {"in/z.png": buf.getvalue()})
+    member = indexer.Artwork(
+        fname="z.png", id=3, date=0.0, title="z",
+        source_type="zip", source_path=str(zpath), inner_path="in/z.png",
+    )
+    try:
+        img, full = cache.decode(member, 300)
+    finally:
+        indexer.ARCHIVES.close_all()
+    assert (img.width(), img.height(), full) == (300, 150, False)
+
+
+@requires_qt
+def test_preview_prefetcher_fills_the_cache(qapp, tmp_path):
+    from PIL import Image
+
+    arts = []
+    for i in range(4):
+        Image.new("RGB", (1600, 900), (i * 60, 0, 0)).save(tmp_path / f"p{i}.jpg")
+        arts.append(_art(i, f"p{i}", f"p{i}.jpg"))
+    cache = indexer.PreviewCache(tmp_path)
+    prefetcher = indexer.PreviewPrefetcher(cache)
+    ready = []
+    prefetcher.ready.connect(ready.append)
+    try:
+        prefetcher.request(arts, 512)
+        _wait(lambda: len(ready) == len(arts))
+        assert sorted(ready) == sorted(cache.key(a) for a in arts)
+        for a in arts:
+            assert cache.get(cache.key(a), 512).width() == 512
+
+        # Cached at this size: nothing to do
+        prefetcher.request(arts, 512)
+        assert not prefetcher._pending
+        assert prefetcher.claim(cache.key(arts[0]), 512) is False
+
+        # A bigger pane decodes again; claim() either waits for the running
+        # job or takes a queued one back for the caller
+        prefetcher.request(arts[:1], 1024)
+        key = cache.key(arts[0])
+        if prefetcher.claim(key, 1024):
+            _wait(lambda: ready.count(key) == 2)
+            assert cache.get(key, 1024).width() == 1024
+        else:
+            assert key not in prefetcher._pending
+    finally:
+        prefetcher.shutdown()
+
+
+# Stand-in for ffmpeg: logs "<mode> <source name> <ffmpeg processes
+# running>" per call, holds for STUB_FFMPEG_DELAY seconds and fails on
+# sources starting with BAD. Modes:
+#   gif: writes a small GIF to the last argument
+#   sample: raw 64x36 grey frames for a source "n:k", n frames of which
+#     k..k+2 are detailed and the rest near black
+#   frame: a PNG whose red channel is the sample index asked for with -ss
+STUB_FFMPEG = r'''#!{python}
+import fcntl, hashlib, os, sys, time
+args = sys.argv[1:]
+src = args[args.index("-i") + 1]
+log = os.environ["STUB_FFMPEG_LOG"]
+mode = "sample" if "rawvideo" in args else "frame" if "-ss" in args else "gif"
+
+def bump(step):
+    with open(log + ".lock", "a+") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            cur = int(open(log + ".cur").read())
+        except (OSError, ValueError):
+            cur = 0
+        cur += step
+        open(log + ".cur", "w").write(str(cur))
+        if step > 0:
+            with open(log, "a") as f:
+                f.write(f"{{mode}} {{os.path.basename(src)}} {{cur}}\n")
+
+bump(1)
+try:
+    time.sleep(float(os.environ.get("STUB_FFMPEG_DELAY", "0")))
+    data = open(src, "rb").read()
+    if data.startswith(b"BAD"):
+        sys.exit(1)
+    if mode == "sample":
+        n, k = map(int, data.decode().split(":"))
+        detail = bytes(40 if (x // 8 + y // 8) % 2 else 220 for y in range(36) for x in range(64))
+        sys.stdout.buffer.write(b"".join(detail if k <= i < k + 3 else bytes([10]) * 64 * 36 for i in range(n)))
+    elif mode == "frame":
+        from PIL import Image
+        index = round(float(args[args.index("-ss") + 1]) * 4)
+        Image.new("RGB", (64, 36), (index, 0, 0)).save(args[-1], format="PNG")
+    else:
+        open(args[-1], "wb").write(b"GIF89a" + hashlib.sha256(data).digest())
+finally:
+    bump(-1)
+'''
+
+
+@pytest.fixture
+def stub_ffmpeg(tmp_path, monkeypatch):
+    # Puts the stub first on PATH; returns a reader for its call log
+    if sys.platform == "win32":
+        pytest.skip("the stub ffmpeg is a POSIX script")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    ff = bin_dir / "ffmpeg"
+    ff.write_text(STUB_FFMPEG.format(python=sys.executable))
+    ff.chmod(0o755)
+    log = tmp_path / "ffmpeg.log"
+    monkeypatch.delenv("KEMELVOR_FFMPEG", raising=False)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("STUB_FFMPEG_LOG", str(log))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    def calls():
+        if not log.exists():
+            return []
+        return [(mode, name, int(n)) for mode, name, n in (line.split() for line in log.read_text().splitlines())]
+
+    return calls
+
+
+def _video(directory: Path, name: str, body: bytes):
+    path = directory / name
+    path.write_bytes(body)
+    return path, hashlib.sha256(body).hexdigest()
+
+
+def test_gif_transcoder_runs_at_most_max_procs(tmp_path, stub_ffmpeg, monkeypatch):
+    monkeypatch.setenv("STUB_FFMPEG_DELAY", "0.3")
+    videos = [_video(tmp_path, f"v{i}.mp4", f"video {i}".encode()) for i in range(6)]
+    transcoder = indexer.GifTranscoder(root=tmp_path / "gifs", max_procs=2)
+    try:
+        futures = [transcoder.submit(src, digest) for src, digest in videos]
+        gifs = [fut.result(timeout=30) for fut in futures]
+    finally:
+        transcoder.shutdown()
+
+    assert all(gif.read_bytes().startswith(b"GIF89a") for gif in gifs)
+    calls = stub_ffmpeg()
+    assert sorted(name for _, name, _ in calls) == sorted(src.name for src, _ in videos)
+    assert max(n for _, _, n in calls) == 2
+
+
+def test_gif_transcoder_cache_hit_and_miss(tmp_path, stub_ffmpeg, monkeypatch):
+    monkeypatch.setenv("STUB_FFMPEG_DELAY", "0.2")
+    src, digest = _video(tmp_path, "a.mp4", b"same video")
+    transcoder = indexer.GifTranscoder(root=tmp_path / "gifs")
+    try:
+        # A second request while the first is running shares its job
+        first = transcoder.submit(src, digest)
+        assert transcoder.submit(src, digest) is first
+        gif = first.result(timeout=30)
+    finally:
+        transcoder.shutdown()
+    assert len(stub_ffmpeg()) == 1
+
+    # Cache hit, in a later session too: resolved at once, no ffmpeg
+    transcoder = indexer.GifTranscoder(root=tmp_path / "gifs")
+    try:
+        hit = transcoder.submit(src, digest)
+        assert hit.done() and hit.result() == gif
+        assert len(stub_ffmpeg()) == 1
+
+        other, other_digest = _video(tmp_path, "b.mp4", b"other video")
+        miss = transcoder.submit(other, other_digest)
+        assert miss.result(timeout=30) != gif
+    finally:
+        transcoder.shutdown()
+    assert [name for _, name, _ in stub_ffmpeg()] == ["a.mp4", "b.mp4"]
+
+
+def test_gif_transcoder_cancel_kills_ffmpeg(tmp_path, stub_ffmpeg, monkeypatch):
+    monkeypatch.setenv("STUB_FFMPEG_DELAY", "60")
+    src, digest = _video(tmp_path, "long.mp4", b"long video")
+    cancel = threading.Event()
+    transcoder = indexer.GifTranscoder(root=tmp_path / "gifs")
+    try:
+        fut = transcoder.submit(src, digest, cancel)
+        deadline = time.monotonic() + 10
+        while not stub_ffmpeg() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stub_ffmpeg(), "ffmpeg never started"
+        started = time.monotonic()
+        cancel.set()
+        with pytest.raises(indexer.ExportCancelled):
+            fut.result(timeout=10)
+        assert time.monotonic() - started < 5
+    finally:
+        transcoder.shutdown()
+
+    # Nothing cached and no partial output left behind
+    assert transcoder.store.get_path(transcoder.key(digest)) is None
+    assert not [p for p in (tmp_path / "gifs").rglob("*") if p.is_file()]
+
+
+def _posters(extractor, videos):
+    # poster() blocks, so ask for every video from its own thread
+    results = [None] * len(videos)
+
+    def ask(i, src, digest):
+        try:
+            results[i] = extractor.poster(src, digest)
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=ask, args=(i, *v)) for i, v in enumerate(videos)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(60)
+    return results
+
+
+@pytest.mark.skipif(indexer.compact_art is None, reason="compact_art needs Pillow")
+def test_poster_extractor_bounded_shared_and_cached(tmp_path, stub_ffmpeg, monkeypatch):
+    from PIL import Image
+
+    monkeypatch.setenv("STUB_FFMPEG_DELAY", "0.3")
+    videos = [_video(tmp_path, f"v{k}.mp4", f"20:{k}".encode()) for k in (3, 6, 9, 12)]
+    extractor = indexer.PosterExtractor(max_workers=2)
+    assert extractor.enabled
+    try:
+        # The first video is asked for twice at once; both share one job
+        posters = _posters(extractor, videos + videos[:1])
+    finally:
+        extractor.shutdown()
+
+    assert posters[0] == posters[-1]
+    for (src, _), poster in zip(videos, posters):
+        k = int(src.read_text().split(":")[1])
+        with Image.open(poster) as im:
+            assert k <= im.getpixel((0, 0))[0] <= k + 2  # a frame of the detailed scene
+    calls = stub_ffmpeg()
+    samples = sorted(name for mode, name, _ in calls if mode == "sample")
+    assert samples == sorted(src.name for src, _ in videos)
+    assert max(n for _, _, n in calls) <= 2
+
+    # Cache hit by content hash, e.g. the same video in an archive: no
+    # ffmpeg and no worker processes
+    copy, digest = _video(tmp_path, "copy.mp4", videos[0][0].read_bytes())
+    extractor = indexer.PosterExtractor()
+    try:
+        assert extractor.poster(copy, digest) == posters[0]
+        assert extractor._pool is None
+    finally:
+        extractor.shutdown()
+    assert len(stub_ffmpeg()) == len(calls)
+
+
+@pytest.mark.skipif(indexer.compact_art is None, reason="compact_art needs Pillow")
+def test_poster_extractor_shutdown_cancels_queued(tmp_path, stub_ffmpeg, monkeypatch):
+    from concurrent.futures import CancelledError
+
+    monkeypatch.setenv("STUB_FFMPEG_DELAY", "1")
+    videos = [_video(tmp_path, f"v{k}.mp4", f"8:{k}".encode()) for k in range(4)]
+    extractor = indexer.PosterExtractor(max_workers=1)
+    results = []
+    asking = threading.Thread(target=lambda: results.extend(_posters(extractor, videos)))
+    asking.start()
+    deadline = time.monotonic() + 30
+    while not stub_ffmpeg() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    extractor.shutdown()
+    asking.join(60)
+
+    # The one running finishes, the queued ones are cancelled, and nothing
+    # new (and not cached already) is accepted
+    assert sum(isinstance(r, CancelledError) for r in results) >= 2
+    assert not any(isinstance(r, BaseException) and not isinstance(r, CancelledError) for r in results)
+    with pytest.raises(RuntimeError):
+        extractor.poster(*_video(tmp_path, "late.mp4", b"8:5"))